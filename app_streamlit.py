@@ -1,232 +1,614 @@
 import streamlit as st
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from streamlit_folium import st_folium
 import folium
 import os
+import hashlib
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from array import array
+from collections import OrderedDict
+from itertools import groupby
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
 from pyproj import Transformer
+from pyproj.transformer import TransformerGroup
+from pyproj.enums import TransformDirection
+import shapely
+from shapely.geometry import mapping, shape
+
+try:
+    from numba import njit, prange
+except ImportError:  # Fall back to pyproj for the batched transform
+    njit = None
 
 load_dotenv()
 API_KEY = os.getenv("LANDAPP_API_KEY", "")
 API_BASE = "https://integration-api.thelandapp.com"
 
-# Set up transformer for BNG to WGS84
-bng_to_wgs84 = Transformer.from_crs("epsg:27700", "epsg:4326", always_xy=True)
-
-def reproject_coords(coords):
-    # Handles both single and nested coordinate lists
-    if isinstance(coords[0], (float, int)):
-        return list(bng_to_wgs84.transform(*coords))
-    return [reproject_coords(c) for c in coords]
-
-def reproject_feature(feature):
-    geom = feature.get("geometry", {})
-    if geom.get("type") in ["Point", "LineString", "Polygon", "MultiPoint", "MultiLineString", "MultiPolygon"]:
-        geom["coordinates"] = reproject_coords(geom["coordinates"])
-    feature["geometry"] = geom
-    return feature
-
-def get_all_coords(features):
-    coords = []
-    def extract_coords(geom_coords):
-        if isinstance(geom_coords[0], (float, int)):
-            coords.append(geom_coords)
-        else:
-            for c in geom_coords:
-                extract_coords(c)
+# Shared HTTP session so API calls reuse pooled TLS connections across reruns
+@st.cache_resource
+def get_session():
+    session = requests.Session()
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=3, backoff_factor=0.3)),
+    )
+    return session
+
+# Set up transformer for BNG to WGS84, shared across reruns and sessions
+@st.cache_resource
+def get_transformer():
+    return Transformer.from_crs(27700, 4326, always_xy=True)
+
+if njit is not None:
+    def _bng_to_wgs84_kernel(eastings, northings):
+        # OSGB36 National Grid -> WGS84 lon/lat: inverse Transverse Mercator on the
+        # Airy 1830 ellipsoid, then the OSGB36 -> WGS84 Helmert shift (EPSG:1314)
+        a, b = 6377563.396, 6356256.909
+        f0, e0, n0 = 0.9996012717, 400000.0, -100000.0
+        phi0, lam0 = np.radians(49.0), np.radians(-2.0)
+        e2 = 1.0 - (b * b) / (a * a)
+        n = (a - b) / (a + b)
+        n2, n3 = n * n, n * n * n
+        wgs_a = 6378137.0
+        wgs_e2 = 1.0 - (1.0 - 1.0 / 298.257223563) ** 2
+        tx, ty, tz = 446.448, -125.157, 542.06
+        arcsec = np.pi / (180.0 * 3600.0)
+        rx, ry, rz = 0.15 * arcsec, 0.247 * arcsec, 0.842 * arcsec
+        s = 1.0 - 20.489e-6
+        lons = np.empty_like(eastings)
+        lats = np.empty_like(northings)
+        for i in prange(eastings.size):
+            dn = northings[i] - n0
+            phi = phi0 + dn / (a * f0)
+            m = 0.0
+            for _ in range(20):
+                dp, sp = phi - phi0, phi + phi0
+                m = b * f0 * (
+                    (1.0 + n + 1.25 * n2 + 1.25 * n3) * dp
+                    - (3.0 * n + 3.0 * n2 + 2.625 * n3) * np.sin(dp) * np.cos(sp)
+                    + (1.875 * n2 + 1.875 * n3) * np.sin(2.0 * dp) * np.cos(2.0 * sp)
+                    - (35.0 / 24.0) * n3 * np.sin(3.0 * dp) * np.cos(3.0 * sp)
+                )
+                if abs(dn - m) < 1e-5:
+                    break
+                phi += (dn - m) / (a * f0)
+
+            sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+            t = np.tan(phi)
+            t2, t4 = t * t, t * t * t * t
+            nu = a * f0 / np.sqrt(1.0 - e2 * sin_phi * sin_phi)
+            rho = a * f0 * (1.0 - e2) / (1.0 - e2 * sin_phi * sin_phi) ** 1.5
+            eta2 = nu / rho - 1.0
+            sec = 1.0 / cos_phi
+            de = eastings[i] - e0
+            de2 = de * de
+            phi = (
+                phi
+                - t / (2.0 * rho * nu) * de2
+                + t / (24.0 * rho * nu ** 3) * (5.0 + 3.0 * t2 + eta2 - 9.0 * t2 * eta2) * de2 * de2
+                - t / (720.0 * rho * nu ** 5) * (61.0 + 90.0 * t2 + 45.0 * t4) * de2 * de2 * de2
+            )
+            lam = (
+                lam0
+                + sec / nu * de
+                - sec / (6.0 * nu ** 3) * (nu / rho + 2.0 * t2) * de * de2
+                + sec / (120.0 * nu ** 5) * (5.0 + 28.0 * t2 + 24.0 * t4) * de * de2 * de2
+                - sec / (5040.0 * nu ** 7) * (61.0 + 662.0 * t2 + 1320.0 * t4 + 720.0 * t4 * t2)
+                * de * de2 * de2 * de2
+            )
+
+            # Geodetic -> cartesian on Airy 1830, then Helmert (position vector)
+            sin_phi, cos_phi = np.sin(phi), np.cos(phi)
+            nu = a / np.sqrt(1.0 - e2 * sin_phi * sin_phi)
+            x = nu * cos_phi * np.cos(lam)
+            y = nu * cos_phi * np.sin(lam)
+            z = (1.0 - e2) * nu * sin_phi
+            x, y, z = (
+                tx + s * x - rz * y + ry * z,
+                ty + rz * x + s * y - rx * z,
+                tz - ry * x + rx * y + s * z,
+            )
+
+            # Cartesian -> geodetic on WGS84
+            p = np.sqrt(x * x + y * y)
+            phi = np.arctan2(z, p * (1.0 - wgs_e2))
+            for _ in range(10):
+                sin_phi = np.sin(phi)
+                nu = wgs_a / np.sqrt(1.0 - wgs_e2 * sin_phi * sin_phi)
+                prev, phi = phi, np.arctan2(z + wgs_e2 * nu * sin_phi, p)
+                if abs(phi - prev) < 1e-12:
+                    break
+            lons[i] = np.degrees(np.arctan2(y, x))
+            lats[i] = np.degrees(phi)
+        return lons, lats
+
+# Compiled once per process; Streamlit re-executes this script on every rerun,
+# so decorating at module level would recompile the kernel each time
+@st.cache_resource
+def get_bng_to_wgs84_batch():
+    return njit(parallel=True, fastmath=True)(_bng_to_wgs84_kernel)
+
+# Below this many points a single pyproj call beats splitting across threads
+PARALLEL_TRANSFORM_MIN = 10_000
+
+@st.cache_resource
+def get_transform_executor():
+    # Worker threads plus a thread-local slot for each worker's own Transformer
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1), threading.local()
+
+def _transform_chunk(local, chunk):
+    # PROJ contexts are not shared between threads, so each worker keeps its own Transformer
+    if not hasattr(local, "transformer"):
+        local.transformer = Transformer.from_crs(27700, 4326, always_xy=True)
+    xs, ys = chunk
+    return local.transformer.transform(xs, ys, direction=TransformDirection.FORWARD)
+
+def pyproj_bng_to_wgs84(xs, ys):
+    # pyproj releases the GIL while transforming, so large batches are split across threads
+    workers = os.cpu_count() or 1
+    if workers == 1 or xs.size < PARALLEL_TRANSFORM_MIN:
+        return get_transformer().transform(xs, ys, direction=TransformDirection.FORWARD)
+    chunks = zip(np.array_split(xs, workers), np.array_split(ys, workers))
+    executor, local = get_transform_executor()
+    lons, lats = zip(*executor.map(partial(_transform_chunk, local), chunks))
+    return np.concatenate(lons), np.concatenate(lats)
+
+@st.cache_resource
+def kernel_matches_pyproj():
+    # The kernel only implements the OSGB36 -> WGS84 Helmert shift, so it is only
+    # used when that is also pyproj's best available operation (i.e. the more
+    # accurate OSTN15 grid is not installed)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        group = TransformerGroup(27700, 4326, always_xy=True)
+    return bool(group.transformers) and "OSGB36 to WGS 84 (6)" in group.transformers[0].description
+
+def transform_bng_to_wgs84(xs, ys):
+    # The compiled kernel pays ~1.5 s to compile once per process and is no faster
+    # than pyproj on one core, so it is only worth it for large plans on multi-core hosts
+    if (
+        njit is not None
+        and xs.size >= PARALLEL_TRANSFORM_MIN
+        and (os.cpu_count() or 1) > 1
+        and kernel_matches_pyproj()
+    ):
+        return get_bng_to_wgs84_batch()(xs, ys)
+    return pyproj_bng_to_wgs84(xs, ys)
+
+GEOMETRY_TYPES = ["Point", "LineString", "Polygon", "MultiPoint", "MultiLineString", "MultiPolygon"]
+
+def _collect_geometry(coords, xs, ys, extras):
+    # Appends every position to xs/ys (any Z/M values go to extras, keyed by
+    # position index) and returns the nesting shape: None for a single position,
+    # a count for a list of positions, or a list of child shapes for deeper nesting
+    if coords and isinstance(coords[0], (float, int)):
+        if len(coords) > 2:
+            extras[len(xs)] = coords[2:]
+        xs.append(coords[0])
+        ys.append(coords[1])
+        return None
+    if not coords or isinstance(coords[0][0], (float, int)):
+        for position in coords:
+            if len(position) > 2:
+                extras[len(xs)] = position[2:]
+            xs.append(position[0])
+            ys.append(position[1])
+        return len(coords)
+    return [_collect_geometry(c, xs, ys, extras) for c in coords]
+
+def collect_coords(features):
+    # Walk every geometry once, flattening positions into two float buffers
+    xs, ys = array("d"), array("d")
+    extras = {}
+    shapes = []
     for feature in features:
-        geom = feature.get("geometry", {})
-        if "coordinates" in geom:
-            extract_coords(geom["coordinates"])
-    return coords
+        geom = feature.get("geometry") or {}
+        if geom.get("type") in GEOMETRY_TYPES:
+            shapes.append(_collect_geometry(geom["coordinates"], xs, ys, extras))
+        else:
+            shapes.append(False)
+    return xs, ys, extras, shapes
+
+def _rebuild_geometry(nesting, lons, lats, extras, start):
+    # Z/M values are carried over unchanged, as pyproj does for this 2D transform
+    if nesting is None:
+        return [lons[start], lats[start], *extras.get(start, ())], start + 1
+    if isinstance(nesting, int):
+        end = start + nesting
+        if not extras:
+            return [list(p) for p in zip(lons[start:end], lats[start:end])], end
+        return [[lons[i], lats[i], *extras.get(i, ())] for i in range(start, end)], end
+    parts = []
+    for child in nesting:
+        part, start = _rebuild_geometry(child, lons, lats, extras, start)
+        parts.append(part)
+    return parts, start
+
+def needs_reproject(xs, ys):
+    # Land App geometry is normally British National Grid; positions that all
+    # fall within lon/lat range are already WGS84
+    return not (np.all(np.abs(xs) <= 180) and np.all(np.abs(ys) <= 90))
+
+@st.cache_data(persist="disk", max_entries=256, show_spinner=False)
+def transform_plan_coords(digest, _xs, _ys):
+    # Transformed positions persisted to disk between runs. Keyed by an exact
+    # digest of the coordinates (Streamlit only samples large arrays when
+    # hashing them), so any edit to a plan is transformed again
+    return transform_bng_to_wgs84(_xs, _ys)
+
+def reproject_features(features):
+    # Reproject all features with a single batched transform call, returning
+    # the features, their positions as a flat (N, 2) lon/lat array and
+    # whether any transform was needed
+    xs, ys, extras, shapes = collect_coords(features)
+    if not xs:
+        return features, np.empty((0, 2)), False
+    xs, ys = np.frombuffer(xs), np.frombuffer(ys)
+    if not needs_reproject(xs, ys):
+        return features, np.column_stack((xs, ys)), False
+    digest = hashlib.blake2b(xs.tobytes() + ys.tobytes()).hexdigest()
+    lons, lats = transform_plan_coords(digest, xs, ys)
+    coords_xy = np.column_stack((lons, lats))
+    lons, lats = lons.tolist(), lats.tolist()
+    start = 0
+    for feature, nesting in zip(features, shapes):
+        if nesting is False:
+            continue
+        feature["geometry"]["coordinates"], start = _rebuild_geometry(nesting, lons, lats, extras, start)
+    return features, coords_xy, True
+
+def simplify_tolerance(coords_xy):
+    # About one pixel, in degrees of latitude, at the deepest zoom the map allows,
+    # so no zoom level shows the dropped vertices; Leaflet's smoothFactor already
+    # simplifies further for the zoom actually in view. North-south pixels are
+    # the smaller ones, and smallest at the plan's northern edge
+    degrees_per_pixel = 360 / (256 * 2 ** MAP_MAX_ZOOM)
+    return degrees_per_pixel * np.cos(np.radians(coords_xy[:, 1].max()))
+
+def simplify_features(features, tolerance):
+    # Drop vertices that make no visible difference on the map in one vectorized call
+    indices = [
+        i for i, f in enumerate(features)
+        if (f.get("geometry") or {}).get("type") in GEOMETRY_TYPES
+    ]
+    geoms = shapely.simplify(
+        [shape(features[i]["geometry"]) for i in indices], tolerance, preserve_topology=True
+    )
+    simplified = list(features)
+    for i, geom in zip(indices, geoms):
+        simplified[i] = {**features[i], "geometry": mapping(geom)}
+    return simplified
+
+FEATURE_STYLE = {
+    "color": "#3388ff",
+    "weight": 5,  # Increased line thickness
+    "opacity": 1.0,
+    "fillOpacity": 0.2,
+    "smoothFactor": 1.5,  # Leaflet drops vertices closer than this many pixels
+}
+
+def feature_style(feature):
+    return FEATURE_STYLE
+
+# Common columns shown first in the features table, followed by any other properties
+TABLE_COLUMNS = ["id", "name", "type", "createdAt", "updatedAt"]
+
+def build_table(features):
+    if not features:
+        return pd.DataFrame(columns=TABLE_COLUMNS)
+    df = pd.json_normalize(features, sep=".")
+    props = {
+        c: c[len("properties."):] for c in df.columns
+        if c.startswith("properties.") and c[len("properties."):] not in TABLE_COLUMNS
+    }
+    df = df.rename(columns={"properties.name": "name", "geometry.type": "type", **props})
+    df = df.reindex(columns=TABLE_COLUMNS + list(props.values()))
+    df[["id", "name", "type"]] = df[["id", "name", "type"]].fillna("").astype("string")
+    for column in ("createdAt", "updatedAt"):
+        df[column] = pd.to_datetime(df[column], format="ISO8601", errors="coerce", cache=True)
+    return df.convert_dtypes()
 
 TEMPLATE_TYPES = [
     "BPS", "CSS", "FRM", "RLE1", "OWNERSHIP", "FR1", "SALES_PLAN", "VALUATION_PLAN", "ESS", "UKHAB", "UKHAB_V2", "USER", "LAND_MANAGEMENT", "LAND_MANAGEMENT_V2", "SFI2022", "SFI2023", "SFI2024", "PEAT_ASSESSMENT", "OSMM", "FER", "WCT", "BLANK_SURVEY", "SOIL_SURVEY", "AGROFORESTRY", "CSS_2025", "HEALTHY_HEDGEROWS", "SAF"
 ]
 
+# Display labels for the template type selectbox
+TEMPLATE_LABELS = MappingProxyType({
+    "BPS": "BPS – Basic Payment Scheme",
+    "CSS": "CSS – Countryside Stewardship",
+    "FRM": "FRM – Field Risk Map",
+    "RLE1": "RLE1 form",
+    "OWNERSHIP": "OWNERSHIP – Ownership Boundary",
+    "FR1": "FR1 – Land Registration (FR1)",
+    "SALES_PLAN": "SALES_PLAN – Sales Plan",
+    "VALUATION_PLAN": "VALUATION_PLAN – Valuation Plan",
+    "ESS": "ESS – Environmental Stewardship",
+    "UKHAB": "UKHAB – Baseline Habitat Assessment*",
+    "UKHAB_V2": "UKHAB_V2 - Baseline Habitat Assessment (UKHab 2.0)*",
+    "USER": "USER – Blank user plan",
+    "LAND_MANAGEMENT": "LAND_MANAGEMENT – Land Management Plan*",
+    "LAND_MANAGEMENT_V2": "LAND_MANAGEMENT_V2 - Land Management Plan (UKHab 2.0)*",
+    "SFI2022": "SFI2022 - Sustainable Farm Incentive 22 (SFI 22)*",
+    "SFI2023": "SFI2023 - Sustainable Farm Incentive 23 (SFI 23)*",
+    "SFI2024": "SFI2024 - Sustainable Farm Incentive 24 (SFI 24)*",
+    "PEAT_ASSESSMENT": "PEAT_ASSESSMENT - Peat Condition Assessment",
+    "OSMM": "OSMM - Ordnance Survey MasterMap",
+    "FER": "FER - Farm Environment Record",
+    "WCT": "WCT - Woodland Creation Template",
+    "BLANK_SURVEY": "BLANK_SURVEY - General Data Collection (Mobile Survey)",
+    "SOIL_SURVEY": "SOIL_SURVEY - Soil Sampling",
+    "AGROFORESTRY": "AGROFORESTRY - Agroforestry Design",
+    "CSS_2025": "CSS_2025 - Countryside Stewardship Higher-Tier (2025)",
+    "HEALTHY_HEDGEROWS": "HEALTHY_HEDGEROWS - Healthy Hedgerows Survey",
+    "SAF": "SAF - Single Application Form",
+})
+
+MAP_WIDTH, MAP_HEIGHT = 700, 500
+MAP_MAX_ZOOM = 18
+
+def base_map():
+    # Identical on every rerun so st_folium keeps the mounted map and only swaps
+    # the features layer. Not shared via st.cache_resource because st_folium
+    # attaches feature_group_to_add to the map it is given.
+    return folium.Map(location=[54.5, -3], zoom_start=6, max_zoom=MAP_MAX_ZOOM, prefer_canvas=True)  # Centered on GB
+
+def _mercator_y(lat):
+    return np.log(np.tan(np.pi / 4 + np.radians(lat) / 2))
+
+def fit_view(coords_xy, width=MAP_WIDTH, height=MAP_HEIGHT, max_zoom=MAP_MAX_ZOOM):
+    # Center and zoom that fit all positions in the map, like Leaflet's fitBounds
+    lo, hi = coords_xy.min(axis=0), coords_xy.max(axis=0)
+    center = (float(lo[1] + hi[1]) / 2, float(lo[0] + hi[0]) / 2)
+    lon_frac = (hi[0] - lo[0]) / 360
+    lat_frac = (_mercator_y(hi[1]) - _mercator_y(lo[1])) / (2 * np.pi)
+    zoom = max_zoom
+    for frac, size in ((lon_frac, width), (lat_frac, height)):
+        if frac > 0:
+            zoom = min(zoom, int(np.floor(np.log2(size / (256 * frac)))))
+    return center, max(zoom, 0)
+
 # Remove outline and box-shadow from Streamlit buttons
-st.markdown(
-    """
-    <style>
-    button[kind="primary"], button[kind="secondary"], .stButton > button {
-        outline: none !important;
-        box-shadow: none !important;
-    }
-    .st-expander > details > summary,
-    .st-expander > details > summary:focus,
-    .st-expander > details > summary:active,
-    .st-expander > details > summary:hover {
-        outline: none !important;
-        box-shadow: none !important;
-        border: none !important;
-        background: inherit;
-    }
-    .st-expander > details[open] > summary,
-    .st-expander > details[open] > summary:focus,
-    .st-expander > details[open] > summary:active,
-    .st-expander > details[open] > summary:hover {
-        outline: none !important;
-        box-shadow: none !important;
-        border: none !important;
-        background: inherit;
-    }
-    .st-expander > details > summary::-webkit-details-marker {
-        display: none;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
-
-# User input for API key
-api_key_input = st.text_input("Enter your Land App API Key", value="", type="password")
-
-# Checkbox for published filter
-published_only = st.checkbox("Show only published projects")
-
-# User selects template type
-selected_template = st.selectbox(
-    "Select a template type",
-    TEMPLATE_TYPES,
-    index=0,
-    format_func=lambda x: {
-        "BPS": "BPS – Basic Payment Scheme",
-        "CSS": "CSS – Countryside Stewardship",
-        "FRM": "FRM – Field Risk Map",
-        "RLE1": "RLE1 form",
-        "OWNERSHIP": "OWNERSHIP – Ownership Boundary",
-        "FR1": "FR1 – Land Registration (FR1)",
-        "SALES_PLAN": "SALES_PLAN – Sales Plan",
-        "VALUATION_PLAN": "VALUATION_PLAN – Valuation Plan",
-        "ESS": "ESS – Environmental Stewardship",
-        "UKHAB": "UKHAB – Baseline Habitat Assessment*",
-        "UKHAB_V2": "UKHAB_V2 - Baseline Habitat Assessment (UKHab 2.0)*",
-        "USER": "USER – Blank user plan",
-        "LAND_MANAGEMENT": "LAND_MANAGEMENT – Land Management Plan*",
-        "LAND_MANAGEMENT_V2": "LAND_MANAGEMENT_V2 - Land Management Plan (UKHab 2.0)*",
-        "SFI2022": "SFI2022 - Sustainable Farm Incentive 22 (SFI 22)*",
-        "SFI2023": "SFI2023 - Sustainable Farm Incentive 23 (SFI 23)*",
-        "SFI2024": "SFI2024 - Sustainable Farm Incentive 24 (SFI 24)*",
-        "PEAT_ASSESSMENT": "PEAT_ASSESSMENT - Peat Condition Assessment",
-        "OSMM": "OSMM - Ordnance Survey MasterMap",
-        "FER": "FER - Farm Environment Record",
-        "WCT": "WCT - Woodland Creation Template",
-        "BLANK_SURVEY": "BLANK_SURVEY - General Data Collection (Mobile Survey)",
-        "SOIL_SURVEY": "SOIL_SURVEY - Soil Sampling",
-        "AGROFORESTRY": "AGROFORESTRY - Agroforestry Design",
-        "CSS_2025": "CSS_2025 - Countryside Stewardship Higher-Tier (2025)",
-        "HEALTHY_HEDGEROWS": "HEALTHY_HEDGEROWS - Healthy Hedgerows Survey",
-        "SAF": "SAF - Single Application Form"
-    }.get(x, x)
-)
-
-# 1. Fetch projects (now takes api_key and template_type)
-def fetch_projects(api_key, template_type, published_only=False):
-    url = f"{API_BASE}/projects?apiKey={api_key}&page=0&size=1000&type={template_type}&from=2025-01-01T06:00:00.000Z"
+@st.cache_resource
+def load_css():
+    with open(os.path.join(os.path.dirname(__file__), "style.css")) as f:
+        return f"<style>{f.read()}</style>"
+
+# Number of projects requested per page; further pages are only fetched on demand
+PROJECTS_PAGE_SIZE = 100
+# Number of responses, and their total size in bytes, kept for conditional GETs
+ETAG_CACHE_SIZE = 128
+ETAG_CACHE_BYTES = 64 * 1024 * 1024
+
+@st.cache_resource
+def get_etag_cache():
+    # {url: (etag, body)} of the last response for each URL, oldest first, and
+    # the lock guarding it (shared by every session and the prefetch workers)
+    return OrderedDict(), threading.Lock()
+
+def get_data(url):
+    # Conditional GET: an unchanged response comes back as 304 with no body
+    etags, lock = get_etag_cache()
+    with lock:
+        cached = etags.get(url)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    resp = get_session().get(url, headers=headers, timeout=30)
+    if resp.status_code == 304 and cached:
+        return orjson.loads(cached[1]).get("data", [])
+    resp.raise_for_status()
+    etag = resp.headers.get("ETag")
+    if etag and len(resp.content) <= ETAG_CACHE_BYTES:
+        with lock:
+            etags[url] = (etag, resp.content)
+            etags.move_to_end(url)
+            total = sum(len(body) for _, body in etags.values())
+            while len(etags) > ETAG_CACHE_SIZE or total > ETAG_CACHE_BYTES:
+                _, (_, body) = etags.popitem(last=False)
+                total -= len(body)
+    return orjson.loads(resp.content).get("data", [])
+
+# 1. Fetch a page of projects (now takes api_key and template_type)
+@st.cache_data(ttl=300, max_entries=64, show_spinner=False)
+def fetch_projects(api_key, template_type, published_only=False, version=0, page=0):
+    url = f"{API_BASE}/projects?apiKey={api_key}&page={page}&size={PROJECTS_PAGE_SIZE}&type={template_type}&from=2025-01-01T06:00:00.000Z"
     if published_only:
         url += "&filter=published"
-    resp = requests.get(url)
-    resp.raise_for_status()
-    return resp.json().get("data", []), url
+    return get_data(url), url
 
 # 2. Fetch features for a project
-def fetch_features(project_id, api_key):
+@st.cache_data(ttl=300, max_entries=64, show_spinner=False)
+def fetch_features(project_id, api_key, version=0):
     url = f"{API_BASE}/projects/{project_id}/features?apiKey={api_key}"
-    resp = requests.get(url)
-    resp.raise_for_status()
-    return resp.json().get("data", [])
-
-# Main app
-if not api_key_input:
-    # Show a blank map of Great Britain
-    m = folium.Map(location=[54.5, -3], zoom_start=6)  # Centered on GB
-    st_folium(m, width=700, height=500)
-else:
-    # --- Fetch projects and show endpoint/response preview ---
-    projects, projects_url = fetch_projects(api_key_input, selected_template, published_only)
-
-    with st.expander("Show projects endpoint URL"):
-        st.code(f"GET {projects_url}", language="text")
-    with st.expander("Show projects JSON response"):
-        st.json(projects)
-
-    if projects:
-        # Group projects by map
-        maps = {}
-        for proj in projects:
-            map_name = proj.get("mapName", "Uncategorized")
-            if map_name not in maps:
-                maps[map_name] = []
-            maps[map_name].append(proj)
-
-        sorted_map_names = sorted(maps.keys())
-        selected_map_name = st.selectbox("Select a map", sorted_map_names)
-
-        if selected_map_name:
-            projects_in_map = maps[selected_map_name]
-            project_options = {proj["name"]: proj["id"] for proj in projects_in_map}
-
-            sorted_plan_names = project_options.keys()
-            selected_project = st.selectbox("Select a plan", sorted_plan_names)
-
-            if selected_project:
-                project_id = project_options[selected_project]
-
-                # --- Fetch features and show endpoint/response preview ---
-                features_url = f"{API_BASE}/projects/{project_id}/features?apiKey={api_key_input}"
-                features = fetch_features(project_id, api_key_input)
-
-                with st.expander("Show features endpoint URL"):
-                    st.code(f"GET {features_url}", language="text")
-                with st.expander("Show features JSON response"):
-                    st.json(features)
-
-                st.write(f"Found {len(features)} features for plan '{selected_project}'")
-
-                # Reproject features (ensure all downstream code uses reprojected features)
-                features_reprojected = [reproject_feature(f) for f in features]
-
-                # Create a folium map
-                m = folium.Map(location=[51.5, -0.1], zoom_start=6)  # Default UK center
-
-                # Add features as GeoJSON with thicker lines
-                for feature in features_reprojected:
-                    folium.GeoJson(
-                        feature,
-                        style_function=lambda x: {
-                            "color": "#3388ff",
-                            "weight": 5,  # Increased line thickness
-                            "opacity": 1.0,
-                            "fillOpacity": 0.2,
-                        }
-                    ).add_to(m)
-
-                # Zoom to bounds (use reprojected features)
-                all_coords = get_all_coords(features_reprojected)
-                if all_coords:
-                    lats, lons = zip(*all_coords)
-                    m.fit_bounds([[min(lons), min(lats)], [max(lons), max(lats)]])
-
-                st_folium(m, width=700, height=500)
-
-                # Show a table of the features data just below the map
-                if features:
-                    import pandas as pd
-                    # Try to extract common properties for the table
-                    def flatten_feature(feat):
-                        props = feat.get('properties', {})
-                        flat = {
-                            'id': feat.get('id', ''),
-                            'name': props.get('name', ''),
-                            'type': feat.get('geometry', {}).get('type', ''),
-                            'createdAt': feat.get('createdAt', ''),
-                            'updatedAt': feat.get('updatedAt', ''),
-                        }
-                        # Add more properties if needed
-                        flat.update({k: v for k, v in props.items() if k not in flat})
-                        return flat
-                    table_data = [flatten_feature(f) for f in features]
-                    df = pd.DataFrame(table_data)
-                    st.dataframe(df, use_container_width=True)
+    return get_data(url)
+
+def load_more_projects(pages_key):
+    st.session_state["project_pages"][pages_key] += 1
+
+def _map_name(proj):
+    return proj.get("mapName") or "Uncategorized"
+
+def _plan_name(proj):
+    # Unnamed plans get a display name so they can still be selected
+    return proj.get("name") or f"Unnamed plan ({proj['id']})"
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def group_projects(projects):
+    # Sort once by map then plan name, and group in a single pass into
+    # {map_name: {plan_name: project_id}}
+    sorted_projects = sorted(projects, key=lambda proj: (_map_name(proj), _plan_name(proj)))
+    maps = {
+        map_name: {_plan_name(proj): proj["id"] for proj in group}
+        for map_name, group in groupby(sorted_projects, key=_map_name)
+    }
+    return list(maps), maps
+
+# Number of plans in the selected map whose features are fetched in the background
+PREFETCH_LIMIT = 4
+
+@st.cache_resource
+def get_prefetch_executor():
+    return ThreadPoolExecutor(max_workers=4)
+
+def prefetch_features(project_ids, api_key, version=0):
+    # Start background fetches so switching plans hits the fetch_features cache.
+    # Only entries for the current api_key/version are kept; finished fetches are
+    # reduced to None so results are read back through the cache, and failed
+    # ones are dropped so they are tried again
+    futures = {}
+    for key, future in st.session_state.get("prefetch", {}).items():
+        if key[1:] != (api_key, version):
+            continue
+        if future is not None and future.done():
+            if future.exception() is not None:
+                continue
+            future = None
+        futures[key] = future
+    st.session_state["prefetch"] = futures
+    executor = get_prefetch_executor()
+    for project_id in project_ids[:PREFETCH_LIMIT]:
+        key = (project_id, api_key, version)
+        if key not in futures:
+            futures[key] = executor.submit(fetch_features, project_id, api_key, version=version)
+
+def get_features(project_id, api_key, version=0):
+    # Wait on a pending prefetch if there is one, then read through the
+    # fetch_features cache (a failed prefetch is simply fetched again)
+    futures = st.session_state.get("prefetch", {})
+    key = (project_id, api_key, version)
+    future = futures.get(key)
+    if future is not None:
+        futures[key] = None
+        if future.exception() is not None:
+            del futures[key]
+    return fetch_features(project_id, api_key, version=version)
+
+# 3. Fetch, reproject and tabulate features once per project/version
+@st.cache_data(ttl=600, max_entries=64, show_spinner=False)
+def prepare_features(project_id, api_key, version=0):
+    features = fetch_features(project_id, api_key, version=version)
+    table = build_table(features)
+    features_reprojected, coords_xy, reprojected = reproject_features(features)
+    if len(coords_xy):
+        features_reprojected = simplify_features(features_reprojected, simplify_tolerance(coords_xy))
+    return features_reprojected, coords_xy, table, reprojected
+
+def main(api_key_default="", show_published_filter=True, show_refresh=True):
+    st.markdown(load_css(), unsafe_allow_html=True)
+
+    # User input for API key
+    api_key_input = st.text_input("Enter your Land App API Key", value=api_key_default, type="password")
+
+    # Checkbox for published filter
+    published_only = show_published_filter and st.checkbox("Show only published projects")
+
+    # User selects template type
+    selected_template = st.selectbox(
+        "Select a template type",
+        TEMPLATE_TYPES,
+        index=0,
+        format_func=lambda x: TEMPLATE_LABELS.get(x, x),
+    )
+
+    # Refresh counter, passed to the cached fetches so a refresh forces a cache miss
+    if "refresh" not in st.session_state:
+        st.session_state["refresh"] = 0
+    if show_refresh and st.button("Refresh"):
+        st.session_state["refresh"] += 1
+
+    # Main app
+    if not api_key_input:
+        # Show a blank map of Great Britain
+        st_folium(base_map(), key="map", width=MAP_WIDTH, height=MAP_HEIGHT)
     else:
-        st.write("No projects found for the selected template type.")
\ No newline at end of file
+        # --- Fetch projects and show endpoint/response preview ---
+        # Only the pages loaded so far for this query are fetched
+        pages_key = (api_key_input, selected_template, published_only, st.session_state["refresh"])
+        project_pages = st.session_state.setdefault("project_pages", {})
+        project_pages.setdefault(pages_key, 1)
+        projects = []
+        for page in range(project_pages[pages_key]):
+            page_projects, projects_url = fetch_projects(
+                api_key_input, selected_template, published_only, version=st.session_state["refresh"], page=page
+            )
+            projects += page_projects
+
+        with st.expander("Show projects endpoint URL"):
+            st.code(f"GET {projects_url}", language="text")
+        with st.expander("Show projects JSON response"):
+            st.json(projects)
+
+        if len(page_projects) == PROJECTS_PAGE_SIZE:
+            st.button("Load more projects", on_click=load_more_projects, args=(pages_key,))
+
+        if projects:
+            # Group projects by map
+            sorted_map_names, maps = group_projects(projects)
+            selected_map_name = st.selectbox("Select a map", sorted_map_names)
+
+            if selected_map_name:
+                project_options = maps[selected_map_name]
+                prefetch_features(list(project_options.values()), api_key_input, st.session_state["refresh"])
+
+                sorted_plan_names = project_options.keys()
+                selected_project = st.selectbox("Select a plan", sorted_plan_names)
+
+                if selected_project:
+                    project_id = project_options[selected_project]
+
+                    # --- Fetch features and show endpoint/response preview ---
+                    features_url = f"{API_BASE}/projects/{project_id}/features?apiKey={api_key_input}"
+                    features = get_features(project_id, api_key_input, version=st.session_state["refresh"])
+
+                    with st.expander("Show features endpoint URL"):
+                        st.code(f"GET {features_url}", language="text")
+                    with st.expander("Show features JSON response"):
+                        st.json(features)
+
+                    st.write(f"Found {len(features)} features for plan '{selected_project}'")
+
+                    # Reproject features (ensure all downstream code uses reprojected features)
+                    features_reprojected, coords_xy, df, reprojected = prepare_features(
+                        project_id, api_key_input, version=st.session_state["refresh"]
+                    )
+                    if features and not reprojected:
+                        st.caption("Geometry is already in WGS84, skipped reprojection")
+
+                    # Add all features as a single GeoJSON layer with thicker lines
+                    feature_group = folium.FeatureGroup(name="Features", show=True)
+                    folium.GeoJson(
+                        {"type": "FeatureCollection", "features": features_reprojected},
+                        style_function=feature_style,
+                    ).add_to(feature_group)
+
+                    # Zoom to bounds (use reprojected features)
+                    center, zoom = fit_view(coords_xy) if len(coords_xy) else (None, None)
+
+                    # Keep the same base map and only swap the features layer
+                    st_folium(
+                        base_map(),
+                        key="map",
+                        width=MAP_WIDTH,
+                        height=MAP_HEIGHT,
+                        center=center,
+                        zoom=zoom,
+                        feature_group_to_add=feature_group,
+                    )
+
+                    # Show a table of the features data just below the map
+                    if features:
+                        st.dataframe(df, use_container_width=True)
+        else:
+            st.write("No projects found for the selected template type.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from pyproj import Transformer
+
+pytest.importorskip("numba")
+
+import app_streamlit
+
+# OSGB36 -> WGS84 (EPSG:1314) as an explicit PROJ pipeline, so the reference
+# does not depend on whether the OSTN15 grid is installed
+HELMERT_PIPELINE = (
+    "+proj=pipeline"
+    " +step +inv +proj=tmerc +lat_0=49 +lon_0=-2 +k=0.9996012717 +x_0=400000 +y_0=-100000 +ellps=airy"
+    " +step +proj=cart +ellps=airy"
+    " +step +proj=helmert +x=446.448 +y=-125.157 +z=542.06 +rx=0.15 +ry=0.247 +rz=0.842"
+    " +s=-20.489 +convention=position_vector"
+    " +step +inv +proj=cart +ellps=WGS84"
+    " +step +proj=unitconvert +xy_in=rad +xy_out=deg"
+)
+
+# Eastings/northings across Great Britain, including the OS guide's worked example
+BNG_POINTS = np.array([
+    [651409.903, 313177.270],
+    [530000.0, 180000.0],  # London
+    [325000.0, 673000.0],  # Edinburgh
+    [318000.0, 176000.0],  # Cardiff
+    [147000.0, 30000.0],  # Penzance
+    [623000.0, 308000.0],  # Norwich
+    [266000.0, 845000.0],  # Inverness
+    [446000.0, 1141000.0],  # Lerwick
+])
+
+
+def test_kernel_matches_pyproj_helmert():
+    xs, ys = BNG_POINTS[:, 0].copy(), BNG_POINTS[:, 1].copy()
+    lons, lats = app_streamlit.get_bng_to_wgs84_batch()(xs, ys)
+    ref_lons, ref_lats = Transformer.from_pipeline(HELMERT_PIPELINE).transform(xs, ys)
+    np.testing.assert_allclose(lons, ref_lons, rtol=0, atol=1e-7)
+    np.testing.assert_allclose(lats, ref_lats, rtol=0, atol=1e-7)
+
+
+def test_os_worked_example():
+    lons, lats = app_streamlit.get_bng_to_wgs84_batch()(np.array([651409.903]), np.array([313177.270]))
+    np.testing.assert_allclose([lons[0], lats[0]], [1.7160520, 52.6579786], rtol=0, atol=1e-6)
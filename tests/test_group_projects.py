@@ -0,0 +1,21 @@
+import app_streamlit
+
+
+def test_group_projects_handles_null_names():
+    projects = [
+        {"id": "1", "name": None, "mapName": None},
+        {"id": "2", "name": "B", "mapName": "Farm"},
+        {"id": "3", "name": "A"},
+        {"id": "4", "mapName": None},
+        {"id": "5", "name": "A", "mapName": "Farm"},
+    ]
+
+    map_names, maps = app_streamlit.group_projects(projects)
+
+    assert map_names == ["Farm", "Uncategorized"]
+    assert list(maps["Farm"].items()) == [("A", "5"), ("B", "2")]
+    assert list(maps["Uncategorized"].items()) == [
+        ("A", "3"),
+        ("Unnamed plan (1)", "1"),
+        ("Unnamed plan (4)", "4"),
+    ]
@@ -0,0 +1,92 @@
+import copy
+
+import numpy as np
+from pyproj import Transformer
+
+import app_streamlit
+
+TRANSFORMER = Transformer.from_crs(27700, 4326, always_xy=True)
+
+BNG_FEATURES = [
+    {"id": "point", "geometry": {"type": "Point", "coordinates": [401000, 301000]}},
+    {"id": "multipoint", "geometry": {"type": "MultiPoint", "coordinates": [[402000, 302000], [402500, 302500]]}},
+    {"id": "null", "geometry": None},
+    {
+        "id": "polygon-with-hole",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [[400000, 300000], [400400, 300000], [400400, 300400], [400000, 300400], [400000, 300000]],
+                [[400100, 300100], [400200, 300100], [400200, 300200], [400100, 300100]],
+            ],
+        },
+    },
+    {"id": "missing"},
+    {
+        "id": "multipolygon",
+        "geometry": {
+            "type": "MultiPolygon",
+            "coordinates": [
+                [[[410000, 310000], [410100, 310000], [410100, 310100], [410000, 310000]]],
+                [[[420000, 320000], [420100, 320000], [420100, 320100], [420000, 320000]]],
+            ],
+        },
+    },
+    {"id": "linestring-z", "geometry": {"type": "LineString", "coordinates": [[403000, 303000, 12.5], [403100, 303100, 14.0]]}},
+]
+
+
+def _per_point(coords):
+    # Baseline behaviour: one pyproj call per position, Z passed through
+    if isinstance(coords[0], (float, int)):
+        return list(TRANSFORMER.transform(*coords[:2])) + list(coords[2:])
+    return [_per_point(c) for c in coords]
+
+
+def _assert_coords_close(actual, expected):
+    if isinstance(expected[0], (float, int)):
+        assert len(actual) == len(expected)
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-9)
+        return
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        _assert_coords_close(a, e)
+
+
+def test_reproject_features_matches_per_point_transform():
+    features, coords_xy, reprojected = app_streamlit.reproject_features(copy.deepcopy(BNG_FEATURES))
+
+    assert reprojected
+    assert [f["id"] for f in features] == [f["id"] for f in BNG_FEATURES]
+    for feature, original in zip(features, BNG_FEATURES):
+        geom = original.get("geometry")
+        if geom is None:
+            assert feature.get("geometry") is None
+            continue
+        assert feature["geometry"]["type"] == geom["type"]
+        _assert_coords_close(feature["geometry"]["coordinates"], _per_point(geom["coordinates"]))
+
+    # 1 + 2 + (5 + 4) + (4 + 4) + 2 positions, in feature order
+    assert coords_xy.shape == (22, 2)
+    np.testing.assert_allclose(coords_xy[0], features[0]["geometry"]["coordinates"], rtol=0, atol=0)
+    np.testing.assert_allclose(coords_xy[-1], features[-1]["geometry"]["coordinates"][-1][:2], rtol=0, atol=0)
+
+
+def test_reproject_features_skips_wgs84_plan():
+    wgs84 = [
+        {"geometry": {"type": "Polygon", "coordinates": [[[-1.5, 52.0], [-1.4, 52.0], [-1.4, 52.1], [-1.5, 52.0]]]}},
+        {"geometry": {"type": "Point", "coordinates": [-1.45, 52.05]}},
+        {"geometry": None},
+    ]
+    features, coords_xy, reprojected = app_streamlit.reproject_features(copy.deepcopy(wgs84))
+
+    assert not reprojected
+    assert features == wgs84
+    np.testing.assert_array_equal(coords_xy[-1], [-1.45, 52.05])
+
+
+def test_reproject_features_without_geometry():
+    features, coords_xy, reprojected = app_streamlit.reproject_features([{"geometry": None}, {}])
+
+    assert not reprojected
+    assert coords_xy.shape == (0, 2)